@@ -1,7 +1,24 @@
 from conan import ConanFile
 from conan.tools.cmake import CMake, CMakeDeps, CMakeToolchain, cmake_layout
-from conan.tools.files import copy
+from conan.tools.files import copy, save
+import hashlib
 import os
+import shutil
+
+
+# package_info() values, keyed by the set of enabled layout options
+_PKG_INFO = {
+    frozenset({"header_only"}): {
+        "libs": [],
+        "defines": ["RESERVOIRCPP_HEADER_ONLY"],
+        "includedirs": ["include"],
+    },
+    frozenset(): {
+        "libs": ["reservoircpp_core"],
+        "defines": [],
+        "includedirs": ["include"],
+    },
+}
 
 
 class ReservoirCppConan(ConanFile):
@@ -55,7 +72,28 @@ class ReservoirCppConan(ConanFile):
         tc.variables["BUILD_TESTS"] = self.options.with_tests
         tc.variables["BUILD_EXAMPLES"] = self.options.with_examples
         tc.variables["BUILD_HEADER_ONLY"] = self.options.header_only
+        # Route compiles through ccache (or COMPILER_LAUNCHER) unless
+        # USE_COMPILER_CACHE=OFF or the launcher is not installed
+        launcher = os.environ.get("COMPILER_LAUNCHER", "ccache")
+        use_cache = os.environ.get("USE_COMPILER_CACHE", "ON").upper() not in ("OFF", "0", "FALSE", "NO")
+        if not (use_cache and shutil.which(launcher)):
+            launcher = ""
+        if launcher:
+            tc.variables["CMAKE_C_COMPILER_LAUNCHER"] = launcher
+            tc.variables["CMAKE_CXX_COMPILER_LAUNCHER"] = launcher
         tc.generate()
+        
+        # Stable digest of everything the generated files depend on: recipe,
+        # version, profile settings, options and [conf], compiler launcher
+        # and the resolved dependency revisions. CI can use it as a cache
+        # key to skip re-running this step when unchanged
+        with open(__file__, "rb") as recipe:
+            key = hashlib.sha256(recipe.read())
+        key.update(f"{self.version}\n{self.settings.dumps()}\n{self.options.dumps()}\n"
+                   f"{self.conf.dumps()}\n{launcher}\n".encode())
+        for pref in sorted(dep.pref.repr_notime() for dep in self.dependencies.values()):
+            key.update(f"{pref}\n".encode())
+        save(self, os.path.join(self.generators_folder, "conan_cache_key.txt"), key.hexdigest())
     
     def build(self):
         if not self.options.header_only:
@@ -72,13 +110,10 @@ class ReservoirCppConan(ConanFile):
             cmake.install()
     
     def package_info(self):
-        if self.options.header_only:
-            self.cpp_info.libs = []
-            self.cpp_info.defines = ["RESERVOIRCPP_HEADER_ONLY"]
-        else:
-            self.cpp_info.libs = ["reservoircpp_core"]
-        
-        self.cpp_info.includedirs = ["include"]
+        cfg = _PKG_INFO[frozenset({"header_only"}) if self.options.header_only else frozenset()]
+        self.cpp_info.libs = list(cfg["libs"])
+        self.cpp_info.defines = list(cfg["defines"])
+        self.cpp_info.includedirs = list(cfg["includedirs"])
         self.cpp_info.requires = ["eigen::eigen"]
         
         # Set compiler features
@@ -4,11 +4,17 @@ Detailed Python to C++ functionality verification script.
 This script compares Python and C++ implementations line by line.
 """
 
+import argparse
+import ast
 import os
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import importlib.util
 
+from verification_core import index_engine, scan_tree
+
 def analyze_python_module(py_file):
     """Analyze a Python module and extract functions and classes."""
     
@@ -17,21 +23,15 @@ def analyze_python_module(py_file):
         with open(py_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Simple parsing to extract function and class definitions
-        functions = []
-        classes = []
+        # Parse the module to extract function and class definitions
+        tree = ast.parse(content, filename=str(py_file))
+        definitions = sorted((node for node in ast.walk(tree)
+                              if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))),
+                             key=lambda node: (node.lineno, node.col_offset))
         
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line.startswith('def ') and not line.startswith('def _'):
-                # Extract public function name
-                func_name = line.split('(')[0].replace('def ', '')
-                functions.append(func_name)
-            elif line.startswith('class '):
-                # Extract class name
-                class_name = line.split('(')[0].split(':')[0].replace('class ', '')
-                classes.append(class_name)
+        functions = [node.name for node in definitions
+                     if not isinstance(node, ast.ClassDef) and not node.name.startswith('_')]
+        classes = [node.name for node in definitions if isinstance(node, ast.ClassDef)]
         
         return {
             'functions': functions,
@@ -46,34 +46,38 @@ def analyze_python_module(py_file):
             'error': str(e)
         }
 
-def check_cpp_equivalent(item_name, cpp_headers_dir, cpp_src_dir):
-    """Check if a Python function/class has a C++ equivalent."""
-    
-    # Search in header files
-    for hpp_file in Path(cpp_headers_dir).rglob('*.hpp'):
-        try:
-            with open(hpp_file, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-                if item_name.lower() in content:
-                    return True, f"Found in {hpp_file.relative_to(cpp_headers_dir)}"
-        except:
-            continue
+def check_cpp_equivalent(symbol, symbol_index):
+    """Check if a Python function/class has a C++ equivalent.
+
+    ``symbol`` must already be lowercased, like the keys of ``symbol_index``.
+    """
     
-    # Search in source files
-    for cpp_file in Path(cpp_src_dir).rglob('*.cpp'):
-        try:
-            with open(cpp_file, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-                if item_name.lower() in content:
-                    return True, f"Found in {cpp_file.relative_to(cpp_src_dir)}"
-        except:
-            continue
+    return symbol_index.get(symbol, (False, "NOT FOUND"))
+
+def changed_files(base_dir, base_ref):
+    """Return resolved paths changed between ``base_ref`` and HEAD.
+
+    Returns ``None`` when git is unavailable or the diff fails.
+    """
     
-    return False, "Not found"
+    try:
+        output = subprocess.check_output(['git', 'diff', '--name-only', f'{base_ref}...HEAD'],
+                                         cwd=base_dir, text=True, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return {(base_dir / line).resolve() for line in output.splitlines() if line}
 
-def main():
+def main(argv=None):
     """Main verification function."""
     
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fast', action='store_true',
+                        help="only verify Python modules changed since --base-ref, or all of them "
+                             "when C++ sources changed")
+    parser.add_argument('--base-ref', default='origin/main',
+                        help="git ref that --fast diffs against (default: origin/main)")
+    args = parser.parse_args(argv)
+    
     base_dir = Path('/workspaces/reservoir-cpp')
     reservoirpy_dir = base_dir / 'reservoirpy'
     cpp_headers_dir = base_dir / 'include'
@@ -94,57 +98,109 @@ def main():
         'type.py'
     ]
     
+    nodes_dir = reservoirpy_dir / 'nodes'
+    node_files = []
+    
+    # Get all Python node files
+    for py_file in nodes_dir.rglob('*.py'):
+        if py_file.name not in ['__init__.py', 'tests']:
+            node_files.append(py_file)
+    
+    partial = False
+    if args.fast:
+        changed = changed_files(base_dir, args.base_ref)
+        if changed is None:
+            print(f"⚠️  Could not diff against {args.base_ref}, running full verification")
+        else:
+            # Symbols are always resolved against the whole C++ tree; a C++
+            # change, including a deleted file, can affect any Python name,
+            # so it forces a full run
+            cpp_roots = [cpp_headers_dir.resolve(), cpp_src_dir.resolve()]
+            cpp_changed = any(path.suffix in ('.hpp', '.cpp') and
+                              any(root in path.parents for root in cpp_roots)
+                              for path in changed)
+            changed_core = [module for module in core_modules
+                            if (reservoirpy_dir / module).resolve() in changed]
+            changed_nodes = [py_file for py_file in node_files if py_file.resolve() in changed]
+            if not cpp_changed and (changed_core or changed_nodes):
+                core_modules, node_files = changed_core, changed_nodes
+                partial = True
+                print(f"Fast mode: {len(core_modules) + len(node_files)} changed Python modules "
+                      f"since {args.base_ref}")
+            else:
+                print(f"Fast mode: {'C++ sources' if cpp_changed else 'no Python modules'} changed "
+                      f"since {args.base_ref}, verifying all modules")
+            print()
+    
+    node_files = node_files[:10]  # Limit to first 10 to avoid too much output
+    
+    # Analyze every Python module up front so the C++ tree is scanned once
+    present_modules = [module for module in core_modules if (reservoirpy_dir / module).exists()]
+    module_paths = [reservoirpy_dir / module for module in present_modules] + node_files
+    with ThreadPoolExecutor() as executor:
+        analyses = list(executor.map(analyze_python_module, module_paths))
+    core_analyses = dict(zip(present_modules, analyses))
+    node_analyses = dict(zip(node_files, analyses[len(present_modules):]))
+    
+    # Collect each distinct name once, however many modules define it
+    names = set()
+    for analysis in core_analyses.values():
+        names.update(analysis['functions'] + analysis['classes'])
+    for analysis in node_analyses.values():
+        names.update(analysis['classes'])
+    
+    # Normalize each name exactly once; the scan and lookups share the keys
+    keys = {name: name.lower() for name in names}
+    print(f"Symbol index: {index_engine(cpp_headers_dir, cpp_src_dir)}")
+    print()
+    # The cache holds one entry keyed on the symbol set, so a narrowed run
+    # must not evict the full run's entry
+    cache_file = None if partial else base_dir / '.verification_cache.json'
+    symbol_index = scan_tree(cpp_headers_dir, cpp_src_dir, frozenset(keys.values()),
+                             cache_file=cache_file)
+    resolved = {name: check_cpp_equivalent(key, symbol_index) for name, key in keys.items()}
+    
     verification_results = {}
     
     print("## Core Module Analysis")
     print("=" * 50)
     
-    for module in core_modules:
-        module_path = reservoirpy_dir / module
-        if module_path.exists():
-            print(f"\n### Analyzing {module}")
-            analysis = analyze_python_module(module_path)
-            
-            if 'error' in analysis:
-                print(f"❌ Error analyzing {module}: {analysis['error']}")
-                continue
-            
-            print(f"Found {len(analysis['functions'])} functions and {len(analysis['classes'])} classes")
-            
-            # Check each function
-            function_results = []
-            for func in analysis['functions']:
-                has_cpp, location = check_cpp_equivalent(func, cpp_headers_dir, cpp_src_dir)
-                function_results.append((func, has_cpp, location))
-                print(f"  Function '{func}': {'✅' if has_cpp else '❌'} {location if has_cpp else 'NOT FOUND'}")
-            
-            # Check each class
-            class_results = []
-            for cls in analysis['classes']:
-                has_cpp, location = check_cpp_equivalent(cls, cpp_headers_dir, cpp_src_dir)
-                class_results.append((cls, has_cpp, location))
-                print(f"  Class '{cls}': {'✅' if has_cpp else '❌'} {location if has_cpp else 'NOT FOUND'}")
-            
-            verification_results[module] = {
-                'functions': function_results,
-                'classes': class_results
-            }
+    for module, analysis in core_analyses.items():
+        print(f"\n### Analyzing {module}")
+        
+        if 'error' in analysis:
+            print(f"❌ Error analyzing {module}: {analysis['error']}")
+            continue
+        
+        print(f"Found {len(analysis['functions'])} functions and {len(analysis['classes'])} classes")
+        
+        # Check each function
+        found_funcs, missing_funcs = set(), set()
+        for func in analysis['functions']:
+            has_cpp, location = resolved[func]
+            (found_funcs if has_cpp else missing_funcs).add(func)
+            print(f"  Function '{func}': {'✅' if has_cpp else '❌'} {location}")
+        
+        # Check each class
+        found_classes, missing_classes = set(), set()
+        for cls in analysis['classes']:
+            has_cpp, location = resolved[cls]
+            (found_classes if has_cpp else missing_classes).add(cls)
+            print(f"  Class '{cls}': {'✅' if has_cpp else '❌'} {location}")
+        
+        verification_results[module] = {
+            'found_funcs': found_funcs,
+            'missing_funcs': missing_funcs,
+            'found_classes': found_classes,
+            'missing_classes': missing_classes
+        }
     
     # Node types analysis
     print("\n\n## Node Types Analysis") 
     print("=" * 50)
     
-    nodes_dir = reservoirpy_dir / 'nodes'
-    node_files = []
-    
-    # Get all Python node files
-    for py_file in nodes_dir.rglob('*.py'):
-        if py_file.name not in ['__init__.py', 'tests']:
-            node_files.append(py_file)
-    
-    for node_file in node_files[:10]:  # Limit to first 10 to avoid too much output
+    for node_file, analysis in node_analyses.items():
         print(f"\n### Analyzing {node_file.relative_to(reservoirpy_dir)}")
-        analysis = analyze_python_module(node_file)
         
         if 'error' in analysis:
             print(f"❌ Error: {analysis['error']}")
@@ -153,25 +209,32 @@ def main():
         print(f"Found {len(analysis['functions'])} functions and {len(analysis['classes'])} classes")
         
         for cls in analysis['classes']:
-            has_cpp, location = check_cpp_equivalent(cls, cpp_headers_dir, cpp_src_dir)
-            print(f"  Class '{cls}': {'✅' if has_cpp else '❌'} {location if has_cpp else 'NOT FOUND'}")
+            has_cpp, location = resolved[cls]
+            print(f"  Class '{cls}': {'✅' if has_cpp else '❌'} {location}")
     
     # Summary
-    print("\n\n## Summary")
+    print(f"\n\n## Summary{' (partial, --fast)' if partial else ''}")
     print("=" * 50)
     
-    total_functions = sum(len(result['functions']) for result in verification_results.values())
-    implemented_functions = sum(1 for result in verification_results.values() 
-                              for func, has_cpp, _ in result['functions'] if has_cpp)
+    implemented_functions = sum(len(result['found_funcs']) for result in verification_results.values())
+    total_functions = implemented_functions + sum(len(result['missing_funcs'])
+                                                  for result in verification_results.values())
     
-    total_classes = sum(len(result['classes']) for result in verification_results.values())
-    implemented_classes = sum(1 for result in verification_results.values()
-                            for cls, has_cpp, _ in result['classes'] if has_cpp)
+    implemented_classes = sum(len(result['found_classes']) for result in verification_results.values())
+    total_classes = implemented_classes + sum(len(result['missing_classes'])
+                                              for result in verification_results.values())
     
     print(f"Functions: {implemented_functions}/{total_functions} implemented")
     print(f"Classes: {implemented_classes}/{total_classes} implemented")
     print(f"Overall: {implemented_functions + implemented_classes}/{total_functions + total_classes}")
     
+    if partial:
+        # Only the changed modules were checked, which says nothing about
+        # the rest of the tree
+        print(f"\nℹ️  Partial coverage: only modules changed since {args.base_ref} were verified.")
+        print("Run without --fast for a migration verdict.")
+        return None
+    
     if (implemented_functions + implemented_classes) >= 0.9 * (total_functions + total_classes):
         print("\n🎉 High confidence: Most functionality is implemented in C++!")
         print("✅ Safe to proceed with Python migration to TO_REMOVE/")
@@ -184,7 +247,9 @@ def main():
 if __name__ == "__main__":
     try:
         success = main()
-        if not success:
+        if success is None:
+            print("ℹ️  Partial functionality verification completed, no migration verdict given.")
+        elif not success:
             print("⚠️  Functionality verification found missing items, but exiting successfully.")
         else:
             print("🎉 Functionality verification completed successfully.")
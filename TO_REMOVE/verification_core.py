@@ -0,0 +1,280 @@
+"""
+Shared C++ symbol scanner for the Python to C++ verification scripts.
+Scan results are memoized per process, so tools that run one after the
+other in the same interpreter reuse a single pass over the C++ tree.
+"""
+
+import functools
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import string
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+# Below this many C++ files, worker start-up costs more than it saves
+PARALLEL_SCAN_MIN_FILES = 64
+
+# Read size used when streaming C++ files through the automaton
+SCAN_CHUNK_SIZE = 64 * 1024
+
+# Bump when a change to the scanner alters which symbols are reported
+SCAN_CACHE_VERSION = 2
+
+# Characters that continue an identifier, as matched by ``\b``
+_WORD_CHARS = frozenset(string.ascii_letters + string.digits + '_')
+
+# Per-process symbol matcher, set up by _init_scanner
+_scanner = None
+
+def _compile_symbol_pattern(all_symbols):
+    """Compile one case-insensitive alternation matching every symbol.
+
+    Symbols only match as whole identifiers, so ``tanh`` is not reported
+    for an occurrence of ``tanh_derivative``. The third-party ``regex``
+    engine is used when installed, as it handles large alternations faster
+    than ``re``.
+    """
+    
+    alternation = b'|'.join(re.escape(sym.encode()) for sym in sorted(all_symbols, key=len, reverse=True))
+    pattern = rb'\b(' + alternation + rb')\b'
+    if regex is not None:
+        return regex.compile(pattern, regex.IGNORECASE | regex.VERSION1)
+    return re.compile(pattern, re.IGNORECASE)
+
+def _init_scanner(all_symbols):
+    """Build the symbol matcher used by ``_scan_file`` in this process."""
+    
+    global _scanner
+    _scanner = {'automaton': None, 'pattern': None,
+                'count': len(all_symbols),
+                # Bytes carried between chunks so that a match straddling a
+                # boundary is seen whole, together with the byte before it
+                'overlap': max(map(len, all_symbols)) + 1}
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for sym in all_symbols:
+            automaton.add_word(sym, sym)
+        automaton.make_automaton()
+        _scanner['automaton'] = automaton
+    else:
+        _scanner['pattern'] = _compile_symbol_pattern(all_symbols)
+
+def _scan_file(cpp_file, root):
+    """Return ``{symbol: (True, location)}`` for the symbols found in one file.
+
+    With ``pyahocorasick`` the file is streamed in ``SCAN_CHUNK_SIZE`` chunks
+    through a single automaton, otherwise it is memory-mapped and searched
+    with one compiled regular expression. Either way, only whole-identifier
+    matches count.
+    """
+    
+    location = f"Found in {os.path.relpath(cpp_file, root)}"
+    matches = {}
+    try:
+        if _scanner['automaton'] is not None:
+            automaton, overlap = _scanner['automaton'], _scanner['overlap']
+            with open(cpp_file, 'rb') as f:
+                tail = b''
+                at_start = True
+                chunk = f.read(SCAN_CHUNK_SIZE)
+                while chunk and len(matches) < _scanner['count']:
+                    next_chunk = f.read(SCAN_CHUNK_SIZE)
+                    text = (tail + chunk).lower().decode('latin-1')
+                    for end, sym in automaton.iter(text):
+                        start = end - len(sym) + 1
+                        # Edges without context were or will be seen whole
+                        # in the neighbouring buffer
+                        if start == 0 and not at_start:
+                            continue
+                        if end == len(text) - 1 and next_chunk:
+                            continue
+                        if start > 0 and text[start - 1] in _WORD_CHARS:
+                            continue
+                        if end < len(text) - 1 and text[end + 1] in _WORD_CHARS:
+                            continue
+                        matches.setdefault(sym, (True, location))
+                    at_start = at_start and len(text) <= overlap
+                    tail = text[-overlap:].encode('latin-1')
+                    chunk = next_chunk
+        elif os.path.getsize(cpp_file):
+            with open(cpp_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for match in _scanner['pattern'].finditer(mm):
+                    matches.setdefault(match.group(1).lower().decode(), (True, location))
+    except OSError:
+        pass
+    return matches
+
+def _scan_cache_key(all_symbols, paths):
+    """Digest the symbol set and the path, mtime and size of every C++ file."""
+    
+    digest = hashlib.blake2b()
+    digest.update(f"{SCAN_CACHE_VERSION}\n{sorted(all_symbols)!r}\n".encode())
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+def _walk_files(root, suffix):
+    """Yield paths of files ending in ``suffix`` below ``root``.
+
+    Directories are visited in the same pre-order as ``Path.rglob`` but
+    without building a ``Path`` for every entry.
+    """
+    
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(suffix):
+                        yield entry.path
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+def list_cpp_files(cpp_headers_dir, cpp_src_dir):
+    """List ``(path, root)`` for every C++ header and source file.
+
+    ``root`` is the directory locations are reported relative to.
+    """
+    
+    return ([(hpp_file, cpp_headers_dir) for hpp_file in _walk_files(cpp_headers_dir, '.hpp')] +
+            [(cpp_file, cpp_src_dir) for cpp_file in _walk_files(cpp_src_dir, '.cpp')])
+
+def build_symbol_index(all_symbols, cpp_files, cache_file=None):
+    """Scan every C++ file once and record where each symbol first appears.
+
+    ``cpp_files`` is the listing returned by ``list_cpp_files``. Symbols
+    are expected lowercased; the returned dict maps each located
+    symbol to ``(True, location)``. Large trees are scanned in worker
+    processes, one file per task, and the walk stops as soon as every
+    symbol has been located. If ``cache_file`` is given, the index is
+    reused from it as long as neither the symbols nor the C++ files changed.
+    """
+    
+    symbol_index = {}
+    if not all_symbols:
+        return symbol_index
+    
+    paths = [path for path, _ in cpp_files]
+    roots = [root for _, root in cpp_files]
+    
+    cache_key = None
+    if cache_file is not None:
+        try:
+            cache_key = _scan_cache_key(all_symbols, paths)
+            cached = json.loads(Path(cache_file).read_text())
+            if cached.get('key') == cache_key:
+                return {sym: tuple(result) for sym, result in cached['index'].items()}
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+    
+    executor = None
+    if len(paths) < PARALLEL_SCAN_MIN_FILES:
+        _init_scanner(all_symbols)
+        partials = map(_scan_file, paths, roots)
+    else:
+        executor = ProcessPoolExecutor(initializer=_init_scanner, initargs=(tuple(all_symbols),))
+        partials = executor.map(_scan_file, paths, roots, chunksize=8)
+    
+    remaining = set(all_symbols)
+    try:
+        # Partials arrive in file order, so the first file still wins
+        for partial in partials:
+            for sym, result in partial.items():
+                symbol_index.setdefault(sym, result)
+            remaining.difference_update(partial)
+            if not remaining:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    
+    if cache_key is not None:
+        try:
+            Path(cache_file).write_text(json.dumps({'key': cache_key, 'index': symbol_index}))
+        except OSError:
+            pass
+    
+    return symbol_index
+
+@functools.lru_cache(maxsize=None)
+def build_tag_index(cpp_headers_dir, cpp_src_dir):
+    """Index C++ identifiers with universal-ctags.
+
+    Returns a dict mapping each lowercased tag name to ``(True, location)``,
+    or ``None`` when ctags is missing or cannot produce JSON output (for
+    instance Exuberant Ctags), in which case callers fall back to scanning.
+    """
+    
+    ctags = shutil.which('ctags')
+    if ctags is None:
+        return None
+    
+    # Tag exactly the files the text scan would read, headers first so their
+    # locations take precedence like in build_symbol_index
+    roots = dict(list_cpp_files(cpp_headers_dir, cpp_src_dir))
+    try:
+        result = subprocess.run([ctags, '--languages=C++', '--kinds-C++=+p', '--fields=+Kn',
+                                 '--output-format=json', '-f', '-', '-L', '-'],
+                                input='\n'.join(roots) + '\n', capture_output=True,
+                                text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    
+    tag_index = {}
+    for line in result.stdout.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get('_type') != 'tag' or entry.get('path') not in roots:
+            continue
+        path = os.path.relpath(entry['path'], roots[entry['path']])
+        tag_index.setdefault(entry['name'].lower(), (True, f"Found in {path}:{entry.get('line', '?')}"))
+    
+    return tag_index
+
+def index_engine(cpp_headers_dir, cpp_src_dir):
+    """Name the engine ``scan_tree`` uses for this tree, for progress output."""
+    
+    if build_tag_index(cpp_headers_dir, cpp_src_dir) is not None:
+        return 'universal-ctags'
+    return 'text scan'
+
+@functools.lru_cache(maxsize=None)
+def scan_tree(cpp_headers_dir, cpp_src_dir, symbols, cache_file=None):
+    """Return the symbol index for ``symbols`` over a headers and sources tree.
+
+    ``symbols`` is a frozenset of lowercased names. When universal-ctags is
+    available, symbols are looked up among the tagged C++ identifiers, so
+    matches in comments and string literals no longer count; otherwise the
+    tree is scanned as text. Results are memoized on the arguments, so the
+    returned dict is shared and must not be modified.
+    """
+    
+    tag_index = build_tag_index(cpp_headers_dir, cpp_src_dir)
+    if tag_index is not None:
+        return {sym: tag_index[sym] for sym in symbols if sym in tag_index}
+    return build_symbol_index(symbols, list_cpp_files(cpp_headers_dir, cpp_src_dir),
+                              cache_file=cache_file)